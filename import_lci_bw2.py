@@ -17,15 +17,42 @@
 
 
 from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, Iterable, Optional, Set, Tuple
 
+import functools
 import hashlib
 import os
+import sys
+from math import isnan
+
 import bw2data as bd
 import bw2io as bi
+from bw2io.errors import NonuniqueCode
 from bw2io.importers import ExcelImporter
+from bw2io.extractors.excel import ExcelExtractor
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # optional accelerator; the stock openpyxl extractor is the fallback
+    CalamineWorkbook = None
+
+try:
+    import rapidfuzz
+except ImportError:  # optional; only needed for the fuzzy biosphere fallback
+    rapidfuzz = None
+
+try:
+    import xxhash
+except ImportError:  # optional accelerator; hashlib.md5 is the fallback
+    xxhash = None
+
+try:
+    import orjson
+except ImportError:  # optional; only needed for the payload cache
+    orjson = None
 
 
 # =============================================================================
@@ -63,15 +90,31 @@ class Config:
     # Overwrite metal databases on reruns
     overwrite_metal_databases: bool = True
 
+    # Worker processes for the parse/link stage (None -> os.cpu_count()).
+    # Database writes always stay on the main process.
+    max_workers: Optional[int] = None
+
     # Custom biosphere handling
     custom_biosphere_db_name: str = "biosphere_custom"
     allow_create_missing_biosphere_flows: bool = False # If you dont like the mapping, you can create custom databases
 
+    # Fuzzy name fallback for biosphere linking (requires rapidfuzz).
+    # Off by default: keeps matching explicit and reproducible.
+    allow_fuzzy_biosphere_fallback: bool = False
+    fuzzy_biosphere_score_cutoff: float = 92.0
+
     # Mapping file for biosphere fixes
     biosphere_mapping_fix_file: Path = (
         Path(__file__).resolve().parent / "Biosphere mapping fix.xlsx"
     )
 
+    # Cache fully-processed workbook payloads between runs (requires orjson).
+    # Keyed by file mtime/size and the resolved ecoinvent DB name, so edits to
+    # a workbook or a different background DB invalidate the entry. Set to
+    # None to disable, or force_reprocess=True to bypass for one run.
+    payload_cache_dir: Optional[Path] = Path.home() / ".cache" / "metal_lci2bw"
+    force_reprocess: bool = False
+
 
 CFG = Config()
 
@@ -83,6 +126,23 @@ CFG = Config()
 _EIKey = Tuple[str, str, str]  # (name, reference product, location)
 _BioExactKey = Tuple[str, Tuple[str, ...], str]  # (norm name, norm categories tuple, norm unit)
 
+
+class _BioCand:
+    """
+    Candidate biosphere flow in the name index.
+
+    __slots__ keeps the per-flow footprint small and makes attribute access
+    faster than tuple indexing in the candidate-selection loops.
+    """
+
+    __slots__ = ("db", "code", "cats", "unit")
+
+    def __init__(self, db: str, code: str, cats: Tuple[str, ...], unit: str):
+        self.db = db
+        self.code = code
+        self.cats = cats
+        self.unit = unit
+
 _BIO_NAME_ALIASES = {
 }
 
@@ -192,63 +252,131 @@ def _custom_flow_code(name: str, categories: Tuple[str, ...], unit: str) -> str:
     """
     Deterministic code for a custom biosphere flow.
 
-    A stable code avoids duplicates across reruns.
+    A stable code avoids duplicates across reruns. Only determinism matters
+    here, not cryptographic strength, so xxh3-128 is used when available —
+    it is roughly an order of magnitude faster than MD5 on short keys. The
+    md5 fallback keeps the script runnable without the optional dependency;
+    flows written under the md5 scheme keep resolving through the legacy
+    code probe in CustomFlowBuffer.add.
     """
     key = f"{name}|{categories}|{unit}".encode("utf-8")
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(key)
     return hashlib.md5(key).hexdigest()
 
 
-def _get_or_create_custom_biosphere_flow(
-    *,
-    db_name: str,
-    flow_name: str,
-    categories: Tuple[str, ...],
-    unit: str,
-) -> Tuple[str, str]:
-    """
-    Return (db_name, code) for a flow in the custom biosphere DB, creating it if missing.
-
-    Parameters
-    ----------
-    db_name:
-        Target database name (e.g., "biosphere_custom").
-    flow_name:
-        Flow name to store.
-    categories:
-        Normalized categories tuple, typically ("air",) or ("water", "surface water"), etc.
-    unit:
-        Normalized unit.
+def _legacy_custom_flow_code(name: str, categories: Tuple[str, ...], unit: str) -> str:
+    """MD5 code written before the xxhash switch (read-compat only)."""
+    key = f"{name}|{categories}|{unit}".encode("utf-8")
+    return hashlib.md5(key).hexdigest()
 
-    Returns
-    -------
-    Tuple[str, str]
-        (db_name, code)
-    """
-    _ensure_custom_biosphere_db(db_name)
 
-    code = _custom_flow_code(flow_name, categories, unit)
-    key = (db_name, code)
+class CustomFlowBuffer:
+    """
+    Batched creation of custom biosphere flows (no DB writes).
+
+    Creating flows one at a time means a full db.load() (deserialize every
+    flow) followed by db.write() (serialize every flow) per missing exchange
+    — O(K²) work for K new flows in a workbook. The buffer loads the custom
+    DB once (lazily) and registers new flows in memory only; the new flows
+    collect in ``pending``, travel in the worker payload, and are written in
+    one batch by _merge_custom_flows on the main process.
+    """
 
-    db = bd.Database(db_name)
-    existing = db.load()
-    if key in existing:
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+        self._data: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None
+        self.pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def _loaded(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        if self._data is None:
+            _ensure_custom_biosphere_db(self.db_name)
+            self._data = bd.Database(self.db_name).load()
+        return self._data
+
+    def add(self, flow_name: str, categories: Tuple[str, ...], unit: str) -> Tuple[str, str]:
+        """Return (db_name, code) for the flow, registering it in memory if missing."""
+        data = self._loaded()
+        code = _custom_flow_code(flow_name, categories, unit)
+        key = (self.db_name, code)
+        if key not in data:
+            if xxhash is not None:
+                legacy_key = (self.db_name, _legacy_custom_flow_code(flow_name, categories, unit))
+                if legacy_key in data:
+                    return legacy_key
+            flow = {
+                "name": flow_name,
+                "categories": categories,
+                "unit": unit,
+                "type": "emission",
+                "code": code,
+            }
+            data[key] = flow
+            self.pending[key] = flow
         return key
 
-    existing[key] = {
-        "name": flow_name,
-        "categories": categories,
-        "unit": unit,
-        "type": "emission",
-        "code": code,
-    }
-    db.write(existing)
-    return key
-
 
 # =============================================================================
 # Excel IO and importer utilities
 # =============================================================================
 
+# Formula-error cell values as calamine renders them; the stock openpyxl
+# extractor maps these to None and downstream parsing relies on that.
+_EXCEL_ERROR_VALUES = frozenset(
+    {"#DIV/0!", "#N/A", "#NAME?", "#NULL!", "#NUM!", "#REF!", "#VALUE!", "#GETTING_DATA"}
+)
+
+
+def _clean_calamine_cell(value: Any) -> Any:
+    """Mirror stock extractor cell handling: strip strings, error cells -> None."""
+    if isinstance(value, str):
+        value = value.strip()
+        if value in _EXCEL_ERROR_VALUES:
+            return None
+    return value
+
+
+class _CalamineExcelExtractor(ExcelExtractor):
+    """
+    Extract workbook contents with python-calamine (Rust-backed XLSX parser).
+
+    Calamine parses the OOXML in a single streaming pass and is roughly an
+    order of magnitude faster than openpyxl on large workbooks, with a much
+    smaller memory footprint. Its raw output is ragged (trailing empty cells
+    trimmed per row) and keeps string cells verbatim, so rows are padded to
+    a uniform width and cells get the same strip/error normalization as the
+    stock extractor before bw2io sees them.
+    """
+
+    @classmethod
+    def extract(cls, filepath):
+        wb = CalamineWorkbook.from_path(str(filepath))
+        out = []
+        for name in wb.sheet_names:
+            raw = wb.get_sheet_by_name(name).to_python()
+            width = max((len(row) for row in raw), default=0)
+            rows = []
+            for row in raw:
+                cells = [_clean_calamine_cell(c) for c in row]
+                if len(cells) < width:
+                    cells.extend([None] * (width - len(cells)))
+                rows.append(cells)
+            out.append((name, rows))
+        return out
+
+
+class FastExcelImporter(ExcelImporter):
+    """
+    ExcelImporter that parses workbooks with the fastest available extractor.
+
+    Uses python-calamine when installed, otherwise the stock openpyxl
+    extractor (which already streams with read_only/data_only). Strategies
+    and downstream linking are unaffected by the backend.
+    """
+
+    extractor = _CalamineExcelExtractor if CalamineWorkbook is not None else ExcelExtractor
+
+
 def _iter_excels(folder: Path) -> Iterable[Path]:
     """Yield Excel files, skipping temporary Office files."""
     for p in sorted(folder.glob("*.xlsx")):
@@ -257,84 +385,36 @@ def _iter_excels(folder: Path) -> Iterable[Path]:
         yield p
 
 
-def _activities_view(importer: ExcelImporter) -> Iterable[Dict[str, Any]]:
+def _activities_list(importer: ExcelImporter) -> list[Dict[str, Any]]:
     """
-    Return a uniform iterable view of activities in an ExcelImporter.
+    Materialize the activities of an ExcelImporter exactly once.
 
     ExcelImporter.data may be:
     - dict keyed by (database, code)
     - list of activities
     - other iterable-like container
+
+    Callers share the returned list instead of re-deriving a view per
+    traversal, which avoids repeated O(N) copies for non-list payloads.
     """
     data = importer.data
     if isinstance(data, dict):
-        return data.values()
+        return list(data.values())
     if isinstance(data, list):
         return data
     return list(data)
 
 
-def _databases_in_importer(importer: ExcelImporter) -> Set[str]:
-    """Extract all database names referenced by activities in the importer payload."""
-    if isinstance(importer.data, dict):
-        return {k[0] for k in importer.data.keys()}
-
+def _databases_in_acts(acts: Iterable[Dict[str, Any]]) -> Set[str]:
+    """Extract all database names referenced by the activity payload."""
     out: Set[str] = set()
-    for act in _activities_view(importer):
+    for act in acts:
         dbname = act.get("database")
         if isinstance(dbname, str) and dbname:
             out.add(dbname)
     return out
 
 
-def _normalize_exchange_inputs_to_tuples(importer: ExcelImporter) -> int:
-    """
-    Convert any exchange input 'db::code' strings to (db, code) tuples.
-
-    Brightway expects inputs as (database, code).
-    """
-    changed = 0
-    for act in _activities_view(importer):
-        for exc in act.get("exchanges", []) or []:
-            if not isinstance(exc, dict):
-                continue
-            inp = exc.get("input")
-            if isinstance(inp, str) and "::" in inp:
-                db_part, code_part = inp.split("::", 1)
-                exc["input"] = (db_part, code_part)
-                changed += 1
-    return changed
-
-
-def _rewrite_background_db_label(importer: ExcelImporter, old_bg: str, new_bg: str) -> int:
-    """
-    Rewrite technosphere references from the Excel background label to the actual ecoinvent DB name.
-
-    This updates:
-    - exchange["database"]
-    - exchange["input"][0] if "input" is already a tuple
-    """
-    if old_bg == new_bg:
-        return 0
-
-    changed = 0
-    for act in _activities_view(importer):
-        for exc in act.get("exchanges", []) or []:
-            if not isinstance(exc, dict):
-                continue
-
-            if exc.get("database") == old_bg:
-                exc["database"] = new_bg
-                changed += 1
-
-            inp = exc.get("input")
-            if isinstance(inp, tuple) and len(inp) == 2 and inp[0] == old_bg:
-                exc["input"] = (new_bg, inp[1])
-                changed += 1
-
-    return changed
-
-
 # =============================================================================
 # Technosphere relinking (ecoinvent)
 # =============================================================================
@@ -351,85 +431,114 @@ def _build_ecoinvent_index(db_name: str) -> Dict[_EIKey, Tuple[str, str]]:
         ref = act.get("reference product")
         loc = act.get("location")
         code = act.get("code")
-        if all(isinstance(x, str) and x for x in (name, ref, loc, code)):
+        # Inline type checks: this runs per DB row (10^4-10^5 iterations), so
+        # avoid the generator + isinstance overhead of all(...).
+        if (
+            type(name) is str and name
+            and type(ref) is str and ref
+            and type(loc) is str and loc
+            and type(code) is str and code
+        ):
             idx[(name, ref, loc)] = (db_name, code)
     return idx
 
 
-def _fill_missing_technosphere_inputs(importer: ExcelImporter) -> int:
+@functools.lru_cache(maxsize=4)
+def _ecoinvent_index(db_name: str) -> Dict[_EIKey, Tuple[str, str]]:
     """
-    Fill missing technosphere exchange inputs using (database, name, reference product, location).
+    Cached ecoinvent index, built at most once per database per run.
 
-    The Excel strategies sometimes produce exchanges with metadata but without "input".
+    _process_excel is called in a loop over every workbook, so without the
+    cache the full ecoinvent DB (~20k activities) would be rescanned per file.
     """
-    indices: Dict[str, Dict[_EIKey, Tuple[str, str]]] = {}
-    fixed = 0
-
-    for act in _activities_view(importer):
-        for exc in act.get("exchanges", []) or []:
-            if not isinstance(exc, dict):
-                continue
-            if exc.get("type") != "technosphere":
-                continue
-            if "input" in exc:
-                continue
-
-            db_name = exc.get("database")
-            name = exc.get("name")
-            ref = exc.get("reference product")
-            loc = exc.get("location")
-
-            if not all(isinstance(x, str) and x for x in (db_name, name, ref, loc)):
-                continue
-            if db_name not in bd.databases:
-                continue
-
-            if db_name not in indices:
-                indices[db_name] = _build_ecoinvent_index(db_name)
-
-            hit = indices[db_name].get((name, ref, loc))
-            if hit:
-                exc["input"] = hit
-                fixed += 1
-
-    return fixed
+    return _build_ecoinvent_index(db_name)
 
 
 # =============================================================================
 # Biosphere relinking (biosphere3 or custom)
 # =============================================================================
 
+@functools.lru_cache(maxsize=16384)
 def _norm(s: str) -> str:
-    """Normalize strings for robust matching."""
+    """
+    Normalize strings for robust matching.
+
+    Memoized: the same flow names, units, and compartments recur thousands of
+    times across index building and exchange resolution, so cache hits replace
+    almost all of the strip/lower/split work. Bounded to keep untrusted input
+    from growing the cache without limit.
+    """
     return " ".join(s.strip().lower().split())
 
 
+def _norm_cats(cats: Any) -> Tuple[str, ...]:
+    """
+    Normalize a categories value (tuple/list, bare string, or missing) to a
+    tuple of normalized strings. Shared by the index builder and the
+    per-exchange biosphere path so the memoized _norm is hit consistently.
+    """
+    if isinstance(cats, (list, tuple)):
+        return tuple(_norm(str(x)) for x in cats)
+    if isinstance(cats, str) and cats:
+        return (_norm(cats),)
+    return tuple()
+
+
 def _build_biosphere_exact_index(db_name: str = "biosphere3") -> Dict[_BioExactKey, Tuple[str, str]]:
     """
     Build an exact-match index for biosphere flows.
 
     Keyed by (norm name, norm categories tuple, norm unit) -> (db_name, code)
+
+    Delegates to the fused builder so the per-flow normalization work exists
+    in exactly one place; callers needing both indices should use
+    _build_biosphere_indices directly to avoid a second DB scan.
+    """
+    return _build_biosphere_indices(db_name)[0]
+
+
+def _build_biosphere_indices(
+    db_name: str = "biosphere3",
+) -> Tuple[Dict[_BioExactKey, Tuple[str, str]], Dict[str, list]]:
+    """
+    Build both biosphere lookup indices in a single pass over the database.
+
+    Returns
+    -------
+    Tuple[exact_idx, name_idx]
+        exact_idx: (norm name, norm categories tuple, norm unit) -> (db, code)
+        name_idx: norm name -> list of (db, code, norm categories tuple, norm unit)
+
+    Both indices share identical per-flow work (fetch and normalize name,
+    categories, unit), so one scan populates both. run() builds them once and
+    passes them to every _process_excel call, instead of rescanning the
+    biosphere DB twice per workbook.
     """
-    idx: Dict[_BioExactKey, Tuple[str, str]] = {}
+    exact_idx: Dict[_BioExactKey, Tuple[str, str]] = {}
+    name_idx: Dict[str, list] = {}
+
     for flow in bd.Database(db_name):
         name = flow.get("name")
         cats = flow.get("categories")
         unit = flow.get("unit")
         code = flow.get("code")
 
-        if not (isinstance(name, str) and isinstance(unit, str) and isinstance(code, str) and code):
+        if not (type(name) is str and type(unit) is str and type(code) is str and code):
             continue
 
-        if isinstance(cats, (list, tuple)):
-            cats_t = tuple(_norm(str(x)) for x in cats)
-        elif isinstance(cats, str) and cats:
-            cats_t = (_norm(cats),)
-        else:
-            cats_t = tuple()
+        cats_t = _norm_cats(cats)
+        name_n = _norm(name)
+        unit_n = _norm(unit)
 
-        idx[(_norm(name), cats_t, _norm(unit))] = (db_name, code)
+        exact_idx[(name_n, cats_t, unit_n)] = (db_name, code)
+        name_idx.setdefault(name_n, []).append(_BioCand(db_name, code, cats_t, unit_n))
 
-    return idx
+    # The name index is read-only after this point: freeze the value lists to
+    # tuples and intern the keys so the hot per-exchange .get() benefits from
+    # CPython's pointer-equality fast path during dict probing.
+    name_idx = {sys.intern(k): tuple(v) for k, v in name_idx.items()}
+
+    return exact_idx, name_idx
 
 
 def load_biosphere_mapping_fix(xlsx_path: Path) -> Dict[str, str]:
@@ -460,75 +569,92 @@ def load_biosphere_mapping_fix(xlsx_path: Path) -> Dict[str, str]:
             f"Found columns: {list(df.columns)}"
         )
 
-    out: Dict[str, str] = {}
-    for _, row in df.iterrows():
-        src = row[cols["error"]]
-        dst = row[cols["to replace"]]
-        if not isinstance(src, str) or not src.strip():
-            continue
-        if not isinstance(dst, str) or not dst.strip():
-            continue
-        out[_norm(src)] = dst.strip()
+    # Series.map still calls the predicate per cell, but on plain values —
+    # the win over df.iterrows() is skipping the per-row Series construction,
+    # not C-level filtering.
+    src = df[cols["error"]]
+    dst = df[cols["to replace"]]
+    mask = (
+        src.map(lambda x: isinstance(x, str) and bool(x.strip()))
+        & dst.map(lambda x: isinstance(x, str) and bool(x.strip()))
+    )
+    return {
+        _norm(s): d.strip()
+        for s, d in zip(src[mask].to_numpy(), dst[mask].to_numpy())
+    }
 
-    return out
 
+# =============================================================================
+# Fused payload transformation and validation
+# =============================================================================
+
+def _is_number(x: Any) -> bool:
+    """
+    Return True for int/float values excluding NaN.
 
-def _fill_missing_biosphere_inputs(
-    importer: ExcelImporter,
-    biosphere_db: str = "biosphere3",
-    name_map: Optional[Dict[str, str]] = None,
-) -> int:
+    Called once per exchange during validation; ints short-circuit before
+    the NaN check, and floats use math.isnan instead of the x != x idiom,
+    which would go through full binary-operator dispatch.
     """
-    Link missing biosphere inputs using a staged approach:
+    t = type(x)
+    return t is int or (t is float and not isnan(x))
 
-    1) Exact match in biosphere3 (name + categories + unit).
-    2) Name replacement from your mapping fix file, then exact match.
-    3) Name-only matching across compartments, with deterministic selection:
-       - prefer same unit
-       - then prefer same top-level compartment (air/soil/water/...)
-       - if still ambiguous: do not guess
-    4) If unresolved and enabled: create a custom biosphere flow.
 
-    This respects your requirement to try across all compartments, and to create
-    new biosphere flows when the mapping file does not cover the missing entry.
+def _transform_importer(
+    acts: Iterable[Dict[str, Any]],
+    *,
+    actual_ecoinvent_db: str,
+    exact_idx: Dict[_BioExactKey, Tuple[str, str]],
+    name_idx: Dict[str, list],
+    flow_buffer: CustomFlowBuffer,
+    name_map: Optional[Dict[str, str]] = None,
+) -> Dict[str, int]:
     """
-    name_map = name_map or {}
+    Apply every payload transform in one activity/exchange traversal.
 
-    # (norm name, norm categories tuple, norm unit) -> (db, code)
-    exact_idx = _build_biosphere_exact_index(biosphere_db)
+    The payload used to be walked six times (input tuple normalization,
+    background label rewrite, technosphere fill, biosphere fill, text
+    sanitation, validation). One fused pass now normalizes inputs, rewrites
+    the Excel background DB label, sanitizes None text fields, and partitions
+    exchanges still missing an "input" into flat technosphere/biosphere
+    lists. The fill loops then touch only those unresolved exchanges:
 
-    # norm name -> list[(db, code, cats_tuple_norm, unit_norm)]
-    name_idx: Dict[str, list[tuple[str, str, tuple[str, ...], str]]] = {}
-    for flow in bd.Database(biosphere_db):
-        name = flow.get("name")
-        cats = flow.get("categories")
-        unit = flow.get("unit")
-        code = flow.get("code")
-        if not (isinstance(name, str) and isinstance(unit, str) and isinstance(code, str) and code):
-            continue
+    - technosphere: lookup by (database, name, reference product, location)
+    - biosphere: staged resolution — exact match, mapping-fix replacement +
+      exact match, name-only matching across compartments with deterministic
+      selection (prefer same unit, then same top-level compartment; never
+      guess when ambiguous), optional fuzzy fallback, and finally a custom
+      biosphere flow if enabled.
 
-        if isinstance(cats, (list, tuple)):
-            cats_t = tuple(_norm(str(x)) for x in cats)
-        elif isinstance(cats, str) and cats:
-            cats_t = (_norm(cats),)
-        else:
-            cats_t = tuple()
+    A final pass validates every exchange for bw2data write, after all fills,
+    failing early with activity context.
 
-        name_idx.setdefault(_norm(name), []).append((biosphere_db, code, cats_t, _norm(unit)))
+    Returns
+    -------
+    Dict[str, int]
+        Counters keyed by "normalized", "bg_rewritten", "tech_filled",
+        "bio_filled", "sanitized", used for the per-file log lines.
+    """
+    name_map = name_map or {}
+    old_bg = CFG.excel_background_db_name
+    # Hoisted no-op detection: when the Excel label already matches the target
+    # DB (or is unset), the rewrite branch is skipped for every exchange —
+    # common on reruns where strategies have already renamed the references.
+    rewrite_bg = bool(old_bg) and old_bg != actual_ecoinvent_db
 
-    def candidates_for_name(name: str) -> list[tuple[str, str, tuple[str, ...], str]]:
+    def candidates_for_name(name: str) -> list[_BioCand]:
         """Return all candidates across compartments for a given name (including aliases)."""
         n0 = _norm(name)
-        out = list(name_idx.get(n0, []))
+        out = list(name_idx.get(n0, ()))
 
         for a in _BIO_NAME_ALIASES.get(n0, []):
-            out.extend(name_idx.get(_norm(a), []))
+            out.extend(name_idx.get(_norm(a), ()))
 
         # De-dup by (db, code)
         seen = set()
         uniq = []
         for item in out:
-            k = (item[0], item[1])
+            k = (item.db, item.code)
             if k in seen:
                 continue
             seen.add(k)
@@ -536,7 +662,7 @@ def _fill_missing_biosphere_inputs(
         return uniq
 
     def choose_best_candidate(
-        cands: list[tuple[str, str, tuple[str, ...], str]],
+        cands: list[_BioCand],
         unit_n: str,
         top_compartment: Optional[str],
     ) -> Optional[Tuple[str, str]]:
@@ -551,144 +677,201 @@ def _fill_missing_biosphere_inputs(
         if not cands:
             return None
 
-        c_unit = [c for c in cands if c[3] == unit_n] or cands
+        c_unit = [c for c in cands if c.unit == unit_n] or cands
 
         if top_compartment:
             tc = _norm(top_compartment)
-            c_tc = [c for c in c_unit if len(c[2]) >= 1 and c[2][0] == tc]
+            c_tc = [c for c in c_unit if c.cats and c.cats[0] == tc]
             if len(c_tc) == 1:
-                return (c_tc[0][0], c_tc[0][1])
+                return (c_tc[0].db, c_tc[0].code)
             if len(c_tc) > 1:
                 return None
 
         if len(c_unit) == 1:
-            return (c_unit[0][0], c_unit[0][1])
+            return (c_unit[0].db, c_unit[0].code)
 
         return None
 
-    fixed = 0
-
-    for act in _activities_view(importer):
-        for exc in act.get("exchanges", []) or []:
-            if not isinstance(exc, dict):
-                continue
-            if exc.get("type") != "biosphere":
-                continue
-            if "input" in exc:
-                continue
-
-            raw_name = exc.get("name")
-            cats = exc.get("categories")
-            unit = exc.get("unit")
-
-            if not (isinstance(raw_name, str) and isinstance(unit, str)):
-                continue
-
-            # Normalize categories from the exchange (may be short: ('air',) etc.)
-            if isinstance(cats, (list, tuple)):
-                cats_t = tuple(_norm(str(x)) for x in cats)
-            elif isinstance(cats, str) and cats:
-                cats_t = (_norm(cats),)
-            else:
-                cats_t = tuple()
-
-            top_comp = cats_t[0] if cats_t else None
-            unit_n = _norm(unit)
-
-            # Step A: exact match with original name
-            name_n = _norm(raw_name)
-            hit = exact_idx.get((name_n, cats_t, unit_n))
-            if hit:
-                exc["input"] = hit
-                fixed += 1
-                continue
-
-            # Step B: mapping fix name replacement, then exact match
-            mapped_name = name_map.get(name_n, raw_name)
-            mapped_n = _norm(mapped_name)
+    # Built lazily: only pay for the choices list when the fallback is on and
+    # an exchange actually falls through to fuzzy matching.
+    fuzzy_choices: Optional[list[str]] = None
 
-            hit = exact_idx.get((mapped_n, cats_t, unit_n))
-            if hit:
-                exc["input"] = hit
-                fixed += 1
-                continue
-
-            # Step C: name-only candidates across compartments
-            cands = candidates_for_name(mapped_name)
-            chosen = choose_best_candidate(cands, unit_n, top_compartment=top_comp)
+    def fuzzy_match_name(name_n: str) -> Optional[str]:
+        """Return the best fuzzy-matched index name above the cutoff, or None."""
+        nonlocal fuzzy_choices
+        if not CFG.allow_fuzzy_biosphere_fallback or rapidfuzz is None:
+            return None
+        if fuzzy_choices is None:
+            fuzzy_choices = list(name_idx.keys())
+        hit = rapidfuzz.process.extractOne(
+            name_n,
+            fuzzy_choices,
+            scorer=rapidfuzz.fuzz.token_set_ratio,
+            score_cutoff=CFG.fuzzy_biosphere_score_cutoff,
+        )
+        return hit[0] if hit else None
+
+    def resolve_biosphere(exc: Dict[str, Any]) -> bool:
+        """Resolve one missing biosphere input in place; True when filled."""
+        raw_name = exc.get("name")
+        cats = exc.get("categories")
+        unit = exc.get("unit")
+
+        if not (isinstance(raw_name, str) and isinstance(unit, str)):
+            return False
+
+        # Normalize categories from the exchange (may be short: ('air',) etc.)
+        cats_t = _norm_cats(cats)
+        top_comp = cats_t[0] if cats_t else None
+        unit_n = _norm(unit)
+
+        # Step A: exact match with original name
+        name_n = _norm(raw_name)
+        hit = exact_idx.get((name_n, cats_t, unit_n))
+        if hit:
+            exc["input"] = hit
+            return True
+
+        # Step B: mapping fix name replacement, then exact match
+        mapped_name = name_map.get(name_n, raw_name)
+        mapped_n = _norm(mapped_name)
+
+        hit = exact_idx.get((mapped_n, cats_t, unit_n))
+        if hit:
+            exc["input"] = hit
+            return True
+
+        # Step C: name-only candidates across compartments
+        cands = candidates_for_name(mapped_name)
+        chosen = choose_best_candidate(cands, unit_n, top_compartment=top_comp)
+        if chosen:
+            exc["input"] = chosen
+            return True
+
+        # Step C': fuzzy name fallback (opt-in, rapidfuzz required)
+        fuzzy_name = fuzzy_match_name(mapped_n)
+        if fuzzy_name is not None:
+            chosen = choose_best_candidate(
+                name_idx.get(fuzzy_name, []), unit_n, top_compartment=top_comp
+            )
             if chosen:
                 exc["input"] = chosen
-                fixed += 1
-                continue
+                return True
 
-            # Step D: create a custom flow if enabled
-            if CFG.allow_create_missing_biosphere_flows:
-                new_input = _get_or_create_custom_biosphere_flow(
-                    db_name=CFG.custom_biosphere_db_name,
-                    flow_name=raw_name,
-                    categories=cats_t,
-                    unit=unit_n,
-                )
-                exc["input"] = new_input
-                fixed += 1
-                continue
-
-            raise ValueError(
-                "Could not resolve biosphere exchange and custom flow creation is disabled.\n"
-                f"Exchange: name={raw_name!r}, mapped_to={mapped_name!r}, categories={cats!r}, unit={unit!r}"
-            )
+        # Step D: create a custom flow if enabled (flushed once per file)
+        if CFG.allow_create_missing_biosphere_flows:
+            exc["input"] = flow_buffer.add(raw_name, cats_t, unit_n)
+            return True
 
-    return fixed
+        raise ValueError(
+            "Could not resolve biosphere exchange and custom flow creation is disabled.\n"
+            f"Exchange: name={raw_name!r}, mapped_to={mapped_name!r}, categories={cats!r}, unit={unit!r}"
+        )
 
+    counts = {
+        "normalized": 0,
+        "bg_rewritten": 0,
+        "tech_filled": 0,
+        "bio_filled": 0,
+        "sanitized": 0,
+    }
 
-def _sanitize_dataset_text_fields(importer: ExcelImporter) -> int:
-    """
-    Ensure text fields are valid strings (Brightway indexing expects strings).
+    missing_tech: list[Dict[str, Any]] = []
+    missing_bio: list[Dict[str, Any]] = []
 
-    Converts None -> "" for dataset-level fields such as 'comment' and 'description'.
-    """
-    changed = 0
-    for act in _activities_view(importer):
+    for act in acts:
         if not isinstance(act, dict):
             continue
 
         for k in ("comment", "description"):
             if k in act and act[k] is None:
                 act[k] = ""
-                changed += 1
-
-        for exc in act.get("exchanges", []) or []:
-            if isinstance(exc, dict) and "comment" in exc and exc["comment"] is None:
-                exc["comment"] = ""
-                changed += 1
-
-    return changed
+                counts["sanitized"] += 1
 
+        adb = act.get("database")
+        acode = act.get("code")
+        ctx = (adb, acode)
 
-# =============================================================================
-# Validation
-# =============================================================================
+        for exc in act.get("exchanges", []) or []:
+            if not isinstance(exc, dict):
+                raise ValueError(f"Non-dict exchange in activity {ctx}: {exc!r}")
 
-def _is_number(x: Any) -> bool:
-    """Return True for int/float values excluding NaN."""
-    return isinstance(x, (int, float)) and not (x != x)  # NaN check
+            # 1) Normalize 'db::code' string inputs to tuples. partition scans
+            # the string once and signals absence via an empty separator,
+            # replacing the separate "in" test plus split.
+            inp = exc.get("input")
+            if isinstance(inp, str):
+                db_part, sep, code_part = inp.partition("::")
+                if sep:
+                    inp = (db_part, code_part)
+                    exc["input"] = inp
+                    counts["normalized"] += 1
+
+            # 2) Rewrite the Excel background label to the actual ecoinvent DB
+            if rewrite_bg:
+                if exc.get("database") == old_bg:
+                    exc["database"] = actual_ecoinvent_db
+                    counts["bg_rewritten"] += 1
+                if isinstance(inp, tuple) and len(inp) == 2 and inp[0] == old_bg:
+                    inp = (actual_ecoinvent_db, inp[1])
+                    exc["input"] = inp
+                    counts["bg_rewritten"] += 1
+
+            exc_type = exc.get("type")
+
+            # 3) Partition missing inputs into flat lists. On well-formed
+            # files these stay empty and the fill loops below run zero times,
+            # instead of re-testing every exchange.
+            if "input" not in exc:
+                if exc_type == "technosphere":
+                    missing_tech.append(exc)
+                elif exc_type == "biosphere":
+                    missing_bio.append(exc)
+
+            # 4) Sanitize None comment fields
+            if "comment" in exc and exc["comment"] is None:
+                exc["comment"] = ""
+                counts["sanitized"] += 1
+
+    # Fill loops: touch only the exchanges that actually need resolution.
+    # Snapshot database names once — bd.databases membership goes through
+    # Brightway metadata, which is too heavy for a per-exchange check, and
+    # no databases are created while filling.
+    known_dbs = frozenset(bd.databases) if missing_tech else frozenset()
+
+    for exc in missing_tech:
+        db_name = exc.get("database")
+        name = exc.get("name")
+        ref = exc.get("reference product")
+        loc = exc.get("location")
+
+        if (
+            type(db_name) is str and db_name
+            and type(name) is str and name
+            and type(ref) is str and ref
+            and type(loc) is str and loc
+            and db_name in known_dbs
+        ):
+            hit = _ecoinvent_index(db_name).get((name, ref, loc))
+            if hit:
+                exc["input"] = hit
+                counts["tech_filled"] += 1
 
+    for exc in missing_bio:
+        if resolve_biosphere(exc):
+            counts["bio_filled"] += 1
 
-def _validate_importer_payload(importer: ExcelImporter) -> None:
-    """
-    Fail early with a precise message if any exchange is invalid for bw2data write.
+    # Validation pass: runs after all fills so every exchange is in its
+    # final form, and surfaces all payload rejects in one place.
+    for act in acts:
+        if not isinstance(act, dict):
+            continue
 
-    This keeps data issues close to the input file and avoids partial writes.
-    """
-    for act in _activities_view(importer):
         adb = act.get("database")
         acode = act.get("code")
         ctx = (adb, acode)
 
         for exc in act.get("exchanges", []) or []:
-            if not isinstance(exc, dict):
-                raise ValueError(f"Non-dict exchange in activity {ctx}: {exc!r}")
-
             missing = [k for k in ("type", "amount", "input") if k not in exc]
             if missing:
                 raise ValueError(f"Missing keys {missing} in exchange for activity {ctx}: {exc!r}")
@@ -700,7 +883,12 @@ def _validate_importer_payload(importer: ExcelImporter) -> None:
                 raise ValueError(f"Non-numeric amount in activity {ctx}: {exc!r}")
 
             inp = exc["input"]
-            if not (isinstance(inp, tuple) and len(inp) == 2 and all(isinstance(i, str) and i for i in inp)):
+            if not (
+                type(inp) is tuple
+                and len(inp) == 2
+                and type(inp[0]) is str and inp[0]
+                and type(inp[1]) is str and inp[1]
+            ):
                 raise ValueError(f"Invalid input format in activity {ctx}: {exc!r}")
 
             # Production must point to the dataset itself
@@ -711,6 +899,8 @@ def _validate_importer_payload(importer: ExcelImporter) -> None:
                             f"Production exchange must point to {(adb, acode)} but got {inp!r}: {exc!r}"
                         )
 
+    return counts
+
 
 # =============================================================================
 # Orchestration
@@ -729,59 +919,286 @@ def _prepare_project() -> str:
     return _ensure_ecoinvent()
 
 
-def _process_excel(
-    *,
-    xlsx: Path,
-    actual_ecoinvent_db: str,
-    biosphere_name_map: Dict[str, str],
-) -> None:
+# =============================================================================
+# Payload caching
+# =============================================================================
+
+def _json_default(obj: Any) -> Any:
+    """orjson fallback: tuples (exchange inputs, categories) become lists."""
+    if isinstance(obj, tuple):
+        return list(obj)
+    raise TypeError(f"Not JSON serializable: {type(obj)!r}")
+
+
+def _payload_cache_path(xlsx: Path, ecoinvent_db: str) -> Optional[Path]:
+    """
+    Cache file location for a workbook's processed payload, or None when
+    caching is unavailable (no orjson) or disabled.
+
+    The signature covers everything the cached links depend on: workbook
+    mtime/size, mapping fix file mtime/size, the target ecoinvent DB, and
+    the linking-relevant config switches — so editing the mapping file or
+    flipping a resolution flag invalidates stale entries by filename.
+    """
+    if orjson is None or CFG.payload_cache_dir is None:
+        return None
+
+    try:
+        st = xlsx.stat()
+        map_st = CFG.biosphere_mapping_fix_file.stat()
+    except OSError:
+        return None
+
+    key = "|".join(
+        (
+            str(st.st_mtime_ns),
+            str(st.st_size),
+            str(map_st.st_mtime_ns),
+            str(map_st.st_size),
+            ecoinvent_db,
+            CFG.excel_background_db_name,
+            CFG.custom_biosphere_db_name,
+            str(CFG.allow_create_missing_biosphere_flows),
+            str(CFG.allow_fuzzy_biosphere_fallback),
+            str(CFG.fuzzy_biosphere_score_cutoff),
+        )
+    ).encode("utf-8")
+    if xxhash is not None:
+        sig = xxhash.xxh3_128_hexdigest(key)
+    else:
+        sig = hashlib.md5(key).hexdigest()
+    return CFG.payload_cache_dir / f"{xlsx.stem}.{sig}.json"
+
+
+def _load_cached_payload(path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Load a cached payload, restoring tuple fields; None if unreadable.
+
+    JSON has no tuple type, so every field the strategies produce as a tuple
+    — exchange inputs, and activity- and exchange-level categories from
+    csv_restore_tuples — must be converted back, or a cache hit would write
+    different data than a cache miss.
+    """
+    try:
+        payload = orjson.loads(path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+    for act in payload["activities"]:
+        cats = act.get("categories")
+        if isinstance(cats, list):
+            act["categories"] = tuple(cats)
+        for exc in act.get("exchanges") or []:
+            inp = exc.get("input")
+            if isinstance(inp, list):
+                exc["input"] = tuple(inp)
+            cats = exc.get("categories")
+            if isinstance(cats, list):
+                exc["categories"] = tuple(cats)
+
+    payload["new_flows"] = {
+        (key[0], key[1]): dict(flow, categories=tuple(flow.get("categories") or ()))
+        for key, flow in payload["new_flows"]
+    }
+    payload["statistics"] = tuple(payload["statistics"])
+    return payload
+
+
+def _store_cached_payload(path: Path, payload: Dict[str, Any]) -> None:
+    """Write the payload cache entry; failures only cost the cache."""
+    serializable = dict(
+        payload,
+        new_flows=[[list(key), flow] for key, flow in payload["new_flows"].items()],
+    )
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Drop entries for older versions of this workbook only. Cache names
+        # are <workbook stem>.<sig>.json and the stem may itself contain
+        # dots, so match the exact stem plus a single dot-free signature
+        # segment instead of globbing on a prefix.
+        prefix = path.stem.rsplit(".", 1)[0] + "."
+        for stale in path.parent.iterdir():
+            if stale == path or not stale.name.startswith(prefix):
+                continue
+            rest = stale.name[len(prefix):]
+            if rest.endswith(".json") and "." not in rest[:-5]:
+                stale.unlink(missing_ok=True)
+        path.write_bytes(orjson.dumps(serializable, default=_json_default))
+    except (OSError, TypeError):
+        # TypeError: a strategy introduced a value orjson cannot encode
+        # (e.g. a set); the run proceeds, it just is not cached.
+        pass
+
+
+# Per-process state for the parse/link stage. Installed by _worker_init in
+# each worker process (and in the main process for serial runs) so that large
+# read-only indices are built once per process instead of pickled per task.
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _worker_init(project_name: str, actual_ecoinvent_db: str) -> None:
+    """
+    Initialize per-process state for _prepare_importer.
+
+    Sets the Brightway project and builds the shared read-only lookup
+    structures (biosphere indices, mapping fix). Safe to call multiple times.
     """
-    Process one BW-formatted Excel file:
-    - apply strategies
-    - normalize/relink
-    - validate
-    - write databases
+    bd.projects.set_current(project_name)
+
+    exact_idx, name_idx = _build_biosphere_indices("biosphere3")
+    _WORKER_STATE.update(
+        ecoinvent_db=actual_ecoinvent_db,
+        bio_exact_idx=exact_idx,
+        bio_name_idx=name_idx,
+        biosphere_name_map=load_biosphere_mapping_fix(CFG.biosphere_mapping_fix_file),
+    )
+
+
+def _prepare_importer(xlsx: Path) -> Dict[str, Any]:
+    """
+    Parse, link, and validate one BW-formatted Excel file (no DB writes).
+
+    This is the CPU-bound half of the pipeline and runs in worker processes;
+    it only reads Brightway data. Returns a picklable payload consumed by
+    _write_payload on the main process.
+
+    When the payload cache holds an entry for this exact file state, the
+    parse/strategy/link work is skipped entirely and the cached payload is
+    returned.
     """
+    cache_path = _payload_cache_path(xlsx, _WORKER_STATE["ecoinvent_db"])
+    if cache_path is not None and not CFG.force_reprocess and cache_path.exists():
+        cached = _load_cached_payload(cache_path)
+        if cached is not None:
+            print(f"\n[Excel] {xlsx.name} (payload cache hit)")
+            return cached
+
     print(f"\n[Excel] {xlsx.name}")
 
-    importer = ExcelImporter(str(xlsx))
+    importer = FastExcelImporter(str(xlsx))
     importer.apply_strategies()
 
-    n_norm = _normalize_exchange_inputs_to_tuples(importer)
-    if n_norm:
-        print(f"[Link] Normalised {n_norm} exchange input(s) to tuples")
+    acts = _activities_list(importer)
+
+    flow_buffer = CustomFlowBuffer(CFG.custom_biosphere_db_name)
+    counts = _transform_importer(
+        acts,
+        actual_ecoinvent_db=_WORKER_STATE["ecoinvent_db"],
+        exact_idx=_WORKER_STATE["bio_exact_idx"],
+        name_idx=_WORKER_STATE["bio_name_idx"],
+        flow_buffer=flow_buffer,
+        name_map=_WORKER_STATE["biosphere_name_map"],
+    )
+
+    payload = {
+        "xlsx_name": xlsx.name,
+        "activities": acts,
+        "databases": sorted(_databases_in_acts(acts)),
+        "counts": counts,
+        "new_flows": flow_buffer.pending,
+        "statistics": importer.statistics(False),
+        "metadata": dict(importer.metadata),
+    }
+
+    if cache_path is not None:
+        _store_cached_payload(cache_path, payload)
 
-    n_bg = _rewrite_background_db_label(importer, CFG.excel_background_db_name, actual_ecoinvent_db)
-    if n_bg:
-        print(f"[Link] Rewired {n_bg} background DB label reference(s)")
+    return payload
 
-    n_tech = _fill_missing_technosphere_inputs(importer)
-    if n_tech:
-        print(f"[Link] Filled {n_tech} missing technosphere input(s) by lookup")
 
-    n_bio = _fill_missing_biosphere_inputs(importer, "biosphere3", name_map=biosphere_name_map)
-    if n_bio:
-        print(f"[Link] Filled {n_bio} missing biosphere input(s) (mapped or custom)")
+def _check_unique_codes(acts: Iterable[Dict[str, Any]]) -> None:
+    """
+    Refuse duplicate (database, code) pairs before writing.
 
-    n_txt = _sanitize_dataset_text_fields(importer)
-    if n_txt:
-        print(f"[Clean] Sanitized {n_txt} None text field(s) to empty strings")
+    bw2io's write_database aborts with NonuniqueCode here; keying the raw
+    bd.Database write by (database, code) would instead silently keep
+    whichever duplicate comes last and drop the others.
+    """
+    seen: Dict[Tuple[Any, Any], Any] = {}
+    clashes: list[str] = []
+    for act in acts:
+        key = (act.get("database"), act.get("code"))
+        if key in seen:
+            clashes.append(f"{key}: {seen[key]!r} / {act.get('name')!r}")
+        else:
+            seen[key] = act.get("name")
+    if clashes:
+        raise NonuniqueCode(
+            "The following activities share a (database, code) pair:\n  " + "\n  ".join(clashes)
+        )
 
-    stats = importer.statistics()
-    print(f"[Excel] Stats (datasets, exchanges, unlinked): {stats}")
 
-    metal_dbs = sorted(_databases_in_importer(importer))
+def _write_payload(payload: Dict[str, Any]) -> None:
+    """
+    Write one prepared workbook payload (serial, main process only).
+
+    All SQLite writes — custom flows, deletion of overwritten metal DBs, and
+    the activity data itself — happen here to avoid write contention between
+    processes.
+    """
+    counts = payload["counts"]
+    if counts["normalized"]:
+        print(f"[Link] Normalised {counts['normalized']} exchange input(s) to tuples")
+    if counts["bg_rewritten"]:
+        print(f"[Link] Rewired {counts['bg_rewritten']} background DB label reference(s)")
+    if counts["tech_filled"]:
+        print(f"[Link] Filled {counts['tech_filled']} missing technosphere input(s) by lookup")
+    if counts["bio_filled"]:
+        print(f"[Link] Filled {counts['bio_filled']} missing biosphere input(s) (mapped or custom)")
+
+    n_new_flows = _merge_custom_flows(payload["new_flows"])
+    if n_new_flows:
+        print(f"[Link] Created {n_new_flows} custom biosphere flow(s) in one write")
+
+    if counts["sanitized"]:
+        print(f"[Clean] Sanitized {counts['sanitized']} None text field(s) to empty strings")
+
+    print(f"[Excel] Stats (datasets, exchanges, unlinked): {payload['statistics']}")
+
+    metal_dbs = payload["databases"]
     print(f"[Excel] Metal database name(s): {metal_dbs}")
 
+    _check_unique_codes(payload["activities"])
+
     if CFG.overwrite_metal_databases:
         for db_name in metal_dbs:
             if db_name in bd.databases:
                 del bd.databases[db_name]
                 print(f"[Write] Deleted existing database: {db_name}")
 
-    _validate_importer_payload(importer)
-    importer.write_database()
-    print(f"[Write] Completed: {xlsx.name}")
+    metadata = payload.get("metadata") or {}
+    for db_name in metal_dbs:
+        data = {
+            (act["database"], act["code"]): act
+            for act in payload["activities"]
+            if act.get("database") == db_name
+        }
+        db = bd.Database(db_name)
+        if db_name not in bd.databases:
+            db.register(format="Excel", **metadata)
+        db.write(data)
+
+    print(f"[Write] Completed: {payload['xlsx_name']}")
+
+
+def _merge_custom_flows(new_flows: Dict[Tuple[str, str], Dict[str, Any]]) -> int:
+    """Merge worker-created custom biosphere flows into the custom DB (one write)."""
+    if not new_flows:
+        return 0
+
+    _ensure_custom_biosphere_db(CFG.custom_biosphere_db_name)
+    db = bd.Database(CFG.custom_biosphere_db_name)
+    data = db.load()
+
+    added = 0
+    for key, flow in new_flows.items():
+        if key not in data:
+            data[key] = flow
+            added += 1
+
+    if added:
+        db.write(data)
+    return added
 
 
 def run() -> None:
@@ -793,6 +1210,10 @@ def run() -> None:
     - ecoinvent exists (imports if missing)
     - missing technosphere inputs are relinked
     - missing biosphere inputs are resolved via biosphere3, mapping fix, or custom biosphere flows
+
+    Parsing and linking are CPU-bound and independent per file, so they run
+    in a process pool when more than one file and worker are available; all
+    database writes stay on the main process.
     """
     actual_ecoinvent_db = _prepare_project()
 
@@ -802,15 +1223,21 @@ def run() -> None:
 
     _ensure_custom_biosphere_db(CFG.custom_biosphere_db_name)
 
-    biosphere_name_map = load_biosphere_mapping_fix(CFG.biosphere_mapping_fix_file)
-    print(f"[Biosphere map] Loaded {len(biosphere_name_map)} name replacements")
-
-    for xlsx in _iter_excels(folder):
-        _process_excel(
-            xlsx=xlsx,
-            actual_ecoinvent_db=actual_ecoinvent_db,
-            biosphere_name_map=biosphere_name_map,
-        )
+    paths = list(_iter_excels(folder))
+    workers = min(CFG.max_workers or os.cpu_count() or 1, len(paths))
+
+    if workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_worker_init,
+            initargs=(CFG.project_name, actual_ecoinvent_db),
+        ) as executor:
+            for payload in executor.map(_prepare_importer, paths):
+                _write_payload(payload)
+    else:
+        _worker_init(CFG.project_name, actual_ecoinvent_db)
+        for xlsx in paths:
+            _write_payload(_prepare_importer(xlsx))
 
     print("\n[Done] Databases in this project:")
     for name in sorted(bd.databases):